@@ -4,22 +4,26 @@ Interview management endpoints
 import uuid
 import logging
 from typing import Optional
-from fastapi import APIRouter, HTTPException, File, UploadFile, Form, Depends
+from fastapi import APIRouter, HTTPException, File, UploadFile, Form, Depends, Request
 from fastapi.responses import FileResponse, HTMLResponse
-import json
 import os
 from datetime import datetime
 
 from app.models.interview import InterviewCreate, InterviewResponse, AnswerSubmission
-from app.db.postgres import get_db_session
-from app.workers.evaluator_worker import enqueue_evaluation
+from app.db.postgres import get_db_session, get_queries
+from app.evaluator.llm_eval import LLMEvaluator
+from app.workers.evaluator_worker import enqueue_evaluation, cancel_evaluation
 from app.utils.file_io import save_uploaded_file, generate_report
-from app.utils.scoring import load_questions, get_next_question
+from app.utils.scoring import load_questions
 from app.config import settings
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+def get_llm(request: Request) -> LLMEvaluator:
+    """The app-scoped LLM evaluator created at startup"""
+    return request.app.state.llm
+
 @router.post("/interviews", response_model=InterviewResponse)
 async def create_interview(interview_data: InterviewCreate):
     """Create a new interview session"""
@@ -33,30 +37,29 @@ async def create_interview(interview_data: InterviewCreate):
         if not questions:
             raise HTTPException(status_code=400, detail="No questions available for specified criteria")
         
-        # Initialize interview session
+        questions = questions[:6]  # Limit to 6 questions
+        
+        # Initialize interview session; the question list and the cursor into it
+        # live in their own columns so /next never has to decode this document
         session_data = {
             "interview_id": interview_id,
             "candidate_id": candidate_id,
             "candidate_name": interview_data.candidate_name,
             "role": interview_data.role,
             "difficulty": interview_data.difficulty,
-            "questions": questions[:6],  # Limit to 6 questions
-            "current_question_index": 0,
             "answers": [],
-            "created_at": datetime.utcnow().isoformat(),
+            "created_at": datetime.utcnow(),
             "status": "active"
         }
         
         # Save to database
+        queries = get_queries()
         async with get_db_session() as db:
-            query = """
-                INSERT INTO interviews (id, candidate_id, candidate_name, role, difficulty, session_data, status)
-                VALUES ($1, $2, $3, $4, $5, $6, $7)
-            """
-            await db.execute(query, interview_id, candidate_id, interview_data.candidate_name,
-                           interview_data.role, interview_data.difficulty, json.dumps(session_data), "active")
+            await db.execute(queries.insert_interview, interview_id, candidate_id, interview_data.candidate_name,
+                           interview_data.role, interview_data.difficulty, session_data, "active",
+                           questions, len(questions))
         
-        first_question = session_data["questions"][0]
+        first_question = questions[0]
         
         return InterviewResponse(
             interview_id=interview_id,
@@ -76,29 +79,32 @@ async def create_interview(interview_data: InterviewCreate):
 async def get_next_question(interview_id: str):
     """Get next question or final status"""
     try:
+        queries = get_queries()
         async with get_db_session() as db:
-            query = "SELECT session_data, status FROM interviews WHERE id = $1"
-            row = await db.fetchrow(query, interview_id)
+            row = await db.fetchrow(queries.select_next_question, interview_id)
             
             if not row:
                 raise HTTPException(status_code=404, detail="Interview not found")
             
-            session_data = json.loads(row["session_data"])
+            # Answers are graded in the background; tell the client how many are still in flight
+            pending_evaluations = max(0, row["current_question_index"] - row["evaluated_count"])
             
             if row["status"] == "completed":
                 return {
                     "status": "completed",
-                    "report_url": f"/api/v1/interviews/{interview_id}/report"
+                    "report_url": f"/api/v1/interviews/{interview_id}/report",
+                    "pending_evaluations": pending_evaluations
                 }
             
-            next_question = get_next_question(session_data)
+            next_question = row["question"]
             
             if not next_question:
                 # Mark interview as completed
-                await db.execute("UPDATE interviews SET status = $1 WHERE id = $2", "completed", interview_id)
+                await db.execute(queries.complete_interview, "completed", interview_id)
                 return {
                     "status": "completed",
-                    "report_url": f"/api/v1/interviews/{interview_id}/report"
+                    "report_url": f"/api/v1/interviews/{interview_id}/report",
+                    "pending_evaluations": pending_evaluations
                 }
             
             return {
@@ -109,9 +115,10 @@ async def get_next_question(interview_id: str):
                     "time_limit": next_question.get("time_limit", 300)
                 },
                 "progress": {
-                    "current": session_data["current_question_index"] + 1,
-                    "total": len(session_data["questions"])
-                }
+                    "current": row["current_question_index"] + 1,
+                    "total": row["total_questions"]
+                },
+                "pending_evaluations": pending_evaluations
             }
             
     except HTTPException:
@@ -120,61 +127,67 @@ async def get_next_question(interview_id: str):
         logger.error(f"Error getting next question: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/interviews/{interview_id}/answer")
+@router.post("/interviews/{interview_id}/answer", status_code=202)
 async def submit_answer(
     interview_id: str,
     answer_text: str = Form(...),
-    file: Optional[UploadFile] = File(None)
+    file: Optional[UploadFile] = File(None),
+    llm: LLMEvaluator = Depends(get_llm)
 ):
-    """Submit an answer with optional file upload"""
+    """Submit an answer with optional file upload; evaluation runs in the background (202 Accepted)"""
     try:
+        queries = get_queries()
+        # Only pull the question being answered, not the whole session document
         async with get_db_session() as db:
-            query = "SELECT session_data FROM interviews WHERE id = $1"
-            row = await db.fetchrow(query, interview_id)
-            
-            if not row:
-                raise HTTPException(status_code=404, detail="Interview not found")
-            
-            session_data = json.loads(row["session_data"])
-            current_index = session_data["current_question_index"]
-            
-            if current_index >= len(session_data["questions"]):
-                raise HTTPException(status_code=400, detail="No more questions available")
-            
-            current_question = session_data["questions"][current_index]
-            
-            # Save uploaded file if provided
-            file_path = None
-            if file:
-                file_path = await save_uploaded_file(file, interview_id, current_question["id"])
-            
-            # Create answer record
-            answer_data = {
-                "question_id": current_question["id"],
-                "answer_text": answer_text,
-                "file_path": file_path,
-                "submitted_at": datetime.utcnow().isoformat(),
-                "evaluation_status": "pending"
-            }
-            
-            session_data["answers"].append(answer_data)
-            session_data["current_question_index"] += 1
-            
-            # Update session data
-            await db.execute(
-                "UPDATE interviews SET session_data = $1 WHERE id = $2",
-                json.dumps(session_data), interview_id
-            )
-            
-            # Enqueue evaluation job
-            job_id = await enqueue_evaluation(interview_id, current_question["id"], answer_data)
-            
-            return {
-                "evaluation_pending": True,
-                "estimated_time_sec": 15,
-                "job_id": job_id
-            }
-            
+            row = await db.fetchrow(queries.select_current_question, interview_id)
+        
+        if not row:
+            raise HTTPException(status_code=404, detail="Interview not found")
+        
+        current_index = row["current_question_index"]
+        current_question = row["current_question"]
+        
+        if current_question is None:
+            raise HTTPException(status_code=400, detail="No more questions available")
+        
+        # Save uploaded file if provided; done before the transaction so the upload
+        # never holds a row lock (or SQLite's write lock)
+        file_path = None
+        if file:
+            file_path = await save_uploaded_file(file, interview_id, current_question["id"])
+        
+        # Create answer record
+        answer_data = {
+            "question_id": current_question["id"],
+            "answer_text": answer_text,
+            "file_path": file_path,
+            "submitted_at": datetime.utcnow(),
+            "evaluation_status": "pending"
+        }
+        
+        job_id = None
+        try:
+            async with get_db_session() as db, db.transaction():
+                # The index guard makes the update a no-op if another submit got there first
+                result = await db.execute(queries.append_answer, answer_data, interview_id, current_index)
+                
+                if result == "UPDATE 0":
+                    raise HTTPException(status_code=409, detail="Answer already submitted for this question")
+                
+                # Only evaluate answers that were recorded; a failed enqueue rolls the answer back
+                job_id = await enqueue_evaluation(interview_id, current_question["id"], answer_data, llm)
+        except BaseException:
+            # The answer was not committed, so its evaluation must not run either
+            if job_id is not None:
+                await cancel_evaluation(job_id)
+            raise
+        
+        return {
+            "evaluation_pending": True,
+            "estimated_time_sec": 15,
+            "job_id": job_id
+        }
+        
     except HTTPException:
         raise
     except Exception as e:
@@ -185,27 +198,30 @@ async def submit_answer(
 async def get_report(interview_id: str, format: str = "html"):
     """Generate and return interview report"""
     try:
+        queries = get_queries()
+        # One connection per request; holding one while waiting for a second can deadlock the pool
         async with get_db_session() as db:
-            query = "SELECT * FROM interviews WHERE id = $1"
-            row = await db.fetchrow(query, interview_id)
-            
-            if not row:
-                raise HTTPException(status_code=404, detail="Interview not found")
-            
-            session_data = json.loads(row["session_data"])
-            
-            # Generate report
-            report_content = await generate_report(session_data, format)
+            row = await db.fetchrow(queries.select_report, interview_id)
+            evaluation_rows = await db.fetch(queries.select_evaluations, interview_id) if row else []
+        
+        if not row:
+            raise HTTPException(status_code=404, detail="Interview not found")
+        
+        session_data = {**row["session_data"], "questions": row["questions"]}
+        evaluations = [dict(r) for r in evaluation_rows]
+        
+        # Generate report
+        report_content = await generate_report(session_data, evaluations, format)
+        
+        if format.lower() == "pdf":
+            return FileResponse(
+                report_content,
+                media_type="application/pdf",
+                filename=f"interview_report_{interview_id}.pdf"
+            )
+        else:
+            return HTMLResponse(content=report_content)
             
-            if format.lower() == "pdf":
-                return FileResponse(
-                    report_content,
-                    media_type="application/pdf",
-                    filename=f"interview_report_{interview_id}.pdf"
-                )
-            else:
-                return HTMLResponse(content=report_content)
-                
     except HTTPException:
         raise
     except Exception as e:
@@ -15,14 +15,30 @@ class Settings(BaseSettings):
     
     # Database
     database_url: Optional[str] = None
+    db_pool_min_size: int = 10
+    db_pool_max_size: int = 50
     
     # Redis for job queue
     redis_url: Optional[str] = None
+    cpu_worker_count: Optional[int] = None  # defaults to the number of CPU cores
+    io_worker_count: int = 8
+    deterministic_result_ttl: int = 24 * 3600  # must outlive the I/O queue backlog
+    worker_db_pool_min_size: int = 1  # per I/O worker process; each job does a single insert
+    worker_db_pool_max_size: int = 2
     
     # LLM API keys
     groq_api_key: Optional[str] = None
     openai_api_key: Optional[str] = None
     
+    # Groq models: a fast one for every answer, a larger one for low-confidence re-grades
+    groq_model: str = "llama-3.1-8b-instant"
+    groq_model_hard: Optional[str] = "llama-3.3-70b-versatile"  # empty to disable escalation
+    groq_escalation_confidence: float = 0.6
+    
+    # LLM response cache (requires redis_url)
+    llm_cache_enabled: bool = False
+    llm_cache_ttl: int = 7 * 24 * 3600  # 7 days
+    
     # File storage
     upload_dir: str = "uploads"
     max_file_size: int = 10 * 1024 * 1024  # 10MB
@@ -36,6 +52,7 @@ class Settings(BaseSettings):
     # Interview settings
     max_questions: int = 6
     default_time_limit: int = 300  # 5 minutes per question
+    questions_file: str = "docs/seed_questions.json"
     
     class Config:
         env_file = ".env"
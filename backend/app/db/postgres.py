@@ -5,33 +5,159 @@ import asyncio
 import logging
 from typing import Optional, AsyncGenerator
 import asyncpg
+import orjson
 import sqlite3
 import aiosqlite
 import os
+from abc import ABC, abstractmethod
 from contextlib import asynccontextmanager
 
 from app.config import settings
+from app.db.queries import InterviewQueries, POSTGRES_QUERIES, SQLITE_QUERIES
 
 logger = logging.getLogger(__name__)
 
-# Global connection pool
+# Adapter selected once in init_db()
+_adapter: Optional["DBAdapter"] = None
 _pool: Optional[asyncpg.Pool] = None
 _sqlite_db: Optional[str] = None
+_sqlite_conn: Optional[aiosqlite.Connection] = None
+_sqlite_read_conn: Optional[aiosqlite.Connection] = None
 
-async def init_db():
-    """Initialize database connection"""
-    global _pool, _sqlite_db
+# Columns stored as JSON text in SQLite; decoded on read to mirror the asyncpg JSONB codec
+_SQLITE_JSON_COLUMNS = frozenset({
+    "session_data", "questions", "question", "current_question", "deterministic_results", "llm_results"
+})
+
+class DBAdapter(ABC):
+    """Database access strategy for one backend, chosen once at startup"""
+    
+    queries: InterviewQueries
+    
+    @abstractmethod
+    def acquire(self):
+        """Async context manager yielding a connection with execute/fetchrow/fetch"""
+
+class PostgresAdapter(DBAdapter):
+    """asyncpg pool; pooled connections are handed out as-is"""
+    
+    queries = POSTGRES_QUERIES
+    
+    def __init__(self, pool: asyncpg.Pool):
+        self.pool = pool
+    
+    def acquire(self):
+        return self.pool.acquire()
+
+class SQLiteSession:
+    """Wraps aiosqlite connections in the subset of the asyncpg API the endpoints use
+
+    Writes go through the shared write connection under write_lock. Reads outside a transaction
+    use a separate read connection: statements on the write connection would see another
+    session's uncommitted transaction, while the read connection only sees committed data.
+    """
+    
+    def __init__(self, conn: aiosqlite.Connection, read_conn: aiosqlite.Connection, write_lock: asyncio.Lock):
+        self.conn = conn
+        self.read_conn = read_conn
+        self.write_lock = write_lock
+        self._in_transaction = False
+    
+    @property
+    def _reader(self) -> aiosqlite.Connection:
+        # Inside our own transaction, read our own uncommitted writes
+        return self.conn if self._in_transaction else self.read_conn
+    
+    @staticmethod
+    def _encode(args):
+        return [orjson.dumps(a).decode() if isinstance(a, (dict, list, tuple)) else a for a in args]
+    
+    @staticmethod
+    def _decode(row) -> dict:
+        return {
+            key: orjson.loads(row[key]) if key in _SQLITE_JSON_COLUMNS and row[key] is not None else row[key]
+            for key in row.keys()
+        }
+    
+    async def execute(self, sql: str, *args) -> str:
+        if self._in_transaction:
+            cursor = await self.conn.execute(sql, self._encode(args))
+        else:
+            # The connection is shared, so keep writes out of another session's transaction
+            async with self.write_lock:
+                cursor = await self.conn.execute(sql, self._encode(args))
+        # Same status format as asyncpg, e.g. "UPDATE 1"
+        return f"{sql.split(None, 1)[0].upper()} {cursor.rowcount}"
+    
+    async def fetchrow(self, sql: str, *args) -> Optional[dict]:
+        async with self._reader.execute(sql, self._encode(args)) as cursor:
+            row = await cursor.fetchone()
+        return self._decode(row) if row is not None else None
+    
+    async def fetch(self, sql: str, *args) -> list:
+        async with self._reader.execute(sql, self._encode(args)) as cursor:
+            rows = await cursor.fetchall()
+        return [self._decode(row) for row in rows]
+    
+    @asynccontextmanager
+    async def transaction(self):
+        """Run the enclosed statements in one write transaction"""
+        async with self.write_lock:
+            # IMMEDIATE takes SQLite's write lock up front so the transaction can't fail to upgrade later
+            await self.conn.execute("BEGIN IMMEDIATE")
+            self._in_transaction = True
+            try:
+                yield
+            except BaseException:
+                await self.conn.rollback()
+                raise
+            else:
+                await self.conn.commit()
+            finally:
+                self._in_transaction = False
+
+class SQLiteAdapter(DBAdapter):
+    """Long-lived aiosqlite write and read connections for local development"""
+    
+    queries = SQLITE_QUERIES
+    
+    def __init__(self, conn: aiosqlite.Connection, read_conn: aiosqlite.Connection):
+        self.conn = conn
+        self.read_conn = read_conn
+        self.write_lock = asyncio.Lock()
+    
+    @asynccontextmanager
+    async def acquire(self):
+        # In WAL mode the read connection proceeds while a write transaction is open, so only writes take the lock
+        yield SQLiteSession(self.conn, self.read_conn, self.write_lock)
+
+async def init_db(pool_min_size: Optional[int] = None, pool_max_size: Optional[int] = None, create_schema: bool = True):
+    """Initialize database connection
+
+    Pool sizes default to the API's settings; background workers pass their own smaller
+    sizes and skip schema creation, which the API process already runs.
+    """
+    global _adapter, _pool, _sqlite_db, _sqlite_conn, _sqlite_read_conn
     
     if settings.database_url and "postgresql" in settings.database_url:
         # PostgreSQL for production
         try:
             _pool = await asyncpg.create_pool(
                 settings.database_url,
-                min_size=2,
-                max_size=10,
-                command_timeout=30
+                min_size=settings.db_pool_min_size if pool_min_size is None else pool_min_size,
+                max_size=settings.db_pool_max_size if pool_max_size is None else pool_max_size,
+                max_inactive_connection_lifetime=300,
+                command_timeout=30,
+                # The interview endpoints only run a handful of distinct statements
+                statement_cache_size=64,
+                max_cached_statement_lifetime=0,
+                # JIT planning costs more than it saves on these small queries
+                server_settings={"jit": "off"},
+                init=_init_connection
             )
-            await _create_postgres_tables()
+            if create_schema:
+                await _create_postgres_tables()
+            _adapter = PostgresAdapter(_pool)
             logger.info("PostgreSQL database initialized")
         except Exception as e:
             logger.error(f"Failed to initialize PostgreSQL: {e}")
@@ -39,18 +165,77 @@ async def init_db():
     else:
         # SQLite for development
         _sqlite_db = "interview_data.db"
-        await _create_sqlite_tables()
+        if create_schema:
+            await _create_sqlite_tables()
+        _sqlite_conn = await _connect_sqlite_writer(_sqlite_db)
+        _sqlite_read_conn = await _connect_sqlite_reader(_sqlite_db)
+        _adapter = SQLiteAdapter(_sqlite_conn, _sqlite_read_conn)
         logger.info("SQLite database initialized")
 
-@asynccontextmanager
-async def get_db_session():
-    """Get database session context manager"""
+async def _connect_sqlite_writer(path: str) -> aiosqlite.Connection:
+    """Open the shared autocommit connection used for writes and transactions"""
+    conn = await aiosqlite.connect(path, isolation_level=None)
+    conn.row_factory = aiosqlite.Row
+    # executescript runs each PRAGMA to completion; an unfinished statement would keep a lock open
+    await conn.executescript("""
+        PRAGMA journal_mode=WAL;
+        PRAGMA synchronous=NORMAL;
+        PRAGMA temp_store=MEMORY;
+        PRAGMA mmap_size=268435456;
+    """)
+    return conn
+
+async def _connect_sqlite_reader(path: str) -> aiosqlite.Connection:
+    """Open the autocommit connection used for reads outside transactions"""
+    conn = await aiosqlite.connect(path, isolation_level=None)
+    conn.row_factory = aiosqlite.Row
+    await conn.executescript("""
+        PRAGMA query_only=ON;
+        PRAGMA temp_store=MEMORY;
+        PRAGMA mmap_size=268435456;
+    """)
+    return conn
+
+async def close_db():
+    """Close the connection pool or shared SQLite connection"""
+    global _adapter, _pool, _sqlite_conn, _sqlite_read_conn
+    
     if _pool:
-        async with _pool.acquire() as conn:
-            yield conn
-    else:
-        async with aiosqlite.connect(_sqlite_db) as conn:
-            yield conn
+        await _pool.close()
+        _pool = None
+    if _sqlite_read_conn:
+        await _sqlite_read_conn.close()
+        _sqlite_read_conn = None
+    if _sqlite_conn:
+        await _sqlite_conn.close()
+        _sqlite_conn = None
+    _adapter = None
+
+def _encode_jsonb(value) -> bytes:
+    """Encode a Python value using the JSONB binary format (version byte + JSON)"""
+    return b"\x01" + orjson.dumps(value)
+
+def _decode_jsonb(data: bytes):
+    """Decode a JSONB binary value, skipping the leading version byte"""
+    return orjson.loads(data[1:])
+
+async def _init_connection(conn: asyncpg.Connection):
+    """Register orjson as the JSONB codec on every pooled connection"""
+    await conn.set_type_codec(
+        "jsonb",
+        encoder=_encode_jsonb,
+        decoder=_decode_jsonb,
+        schema="pg_catalog",
+        format="binary"
+    )
+
+def get_db_session():
+    """Get database session context manager"""
+    return _adapter.acquire()
+
+def get_queries() -> InterviewQueries:
+    """Interview queries compiled for the active database"""
+    return _adapter.queries
 
 async def _create_postgres_tables():
     """Create PostgreSQL tables"""
@@ -64,11 +249,29 @@ async def _create_postgres_tables():
         role VARCHAR(50) NOT NULL,
         difficulty VARCHAR(20) NOT NULL,
         session_data JSONB NOT NULL,
+        questions JSONB NOT NULL DEFAULT '[]',
+        total_questions INT NOT NULL DEFAULT 0,
+        current_question_index INT NOT NULL DEFAULT 0,
         status VARCHAR(20) DEFAULT 'active',
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     );
     
+    ALTER TABLE interviews
+        ADD COLUMN IF NOT EXISTS questions JSONB NOT NULL DEFAULT '[]',
+        ADD COLUMN IF NOT EXISTS total_questions INT NOT NULL DEFAULT 0,
+        ADD COLUMN IF NOT EXISTS current_question_index INT NOT NULL DEFAULT 0;
+    
+    -- Interviews created before the columns existed keep their questions and cursor in
+    -- session_data; copy them over once (new rows always have total_questions > 0)
+    UPDATE interviews
+    SET questions = session_data->'questions',
+        total_questions = jsonb_array_length(session_data->'questions'),
+        current_question_index = COALESCE((session_data->>'current_question_index')::int, 0)
+    WHERE total_questions = 0
+      AND jsonb_typeof(session_data->'questions') = 'array'
+      AND jsonb_array_length(session_data->'questions') > 0;
+    
     CREATE INDEX IF NOT EXISTS idx_interviews_candidate_id ON interviews(candidate_id);
     CREATE INDEX IF NOT EXISTS idx_interviews_status ON interviews(status);
     
@@ -89,6 +292,13 @@ async def _create_postgres_tables():
     async with _pool.acquire() as conn:
         await conn.execute(schema_sql)
 
+# Interview columns added after the original schema, as (name, definition)
+_SQLITE_ADDED_COLUMNS = (
+    ("questions", "TEXT NOT NULL DEFAULT '[]'"),
+    ("total_questions", "INTEGER NOT NULL DEFAULT 0"),
+    ("current_question_index", "INTEGER NOT NULL DEFAULT 0"),
+)
+
 async def _create_sqlite_tables():
     """Create SQLite tables"""
     schema_sql = """
@@ -99,6 +309,9 @@ async def _create_sqlite_tables():
         role TEXT NOT NULL,
         difficulty TEXT NOT NULL,
         session_data TEXT NOT NULL,
+        questions TEXT NOT NULL DEFAULT '[]',
+        total_questions INTEGER NOT NULL DEFAULT 0,
+        current_question_index INTEGER NOT NULL DEFAULT 0,
         status TEXT DEFAULT 'active',
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
@@ -123,4 +336,22 @@ async def _create_sqlite_tables():
     
     async with aiosqlite.connect(_sqlite_db) as conn:
         await conn.executescript(schema_sql)
+        
+        # SQLite has no ADD COLUMN IF NOT EXISTS; upgrade databases created before these columns existed
+        async with conn.execute("PRAGMA table_info(interviews)") as cursor:
+            existing = {row[1] for row in await cursor.fetchall()}
+        for column, definition in _SQLITE_ADDED_COLUMNS:
+            if column not in existing:
+                await conn.execute(f"ALTER TABLE interviews ADD COLUMN {column} {definition}")
+        
+        # Same one-time backfill from session_data as for PostgreSQL
+        await conn.execute("""
+            UPDATE interviews
+            SET questions = json_extract(session_data, '$.questions'),
+                total_questions = json_array_length(session_data, '$.questions'),
+                current_question_index = COALESCE(json_extract(session_data, '$.current_question_index'), 0)
+            WHERE total_questions = 0
+              AND json_type(session_data, '$.questions') = 'array'
+              AND json_array_length(session_data, '$.questions') > 0
+        """)
         await conn.commit()
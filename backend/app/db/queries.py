@@ -0,0 +1,105 @@
+"""
+SQL for the interview endpoints, compiled once per database dialect
+"""
+from dataclasses import dataclass
+
+@dataclass(frozen=True)
+class InterviewQueries:
+    """Interview queries for one SQL dialect"""
+    insert_interview: str
+    select_next_question: str
+    complete_interview: str
+    select_current_question: str
+    append_answer: str
+    select_report: str
+    select_evaluations: str
+    insert_evaluation: str
+    insert_failed_evaluation: str
+
+_INSERT_INTERVIEW = """
+    INSERT INTO interviews (id, candidate_id, candidate_name, role, difficulty, session_data, status,
+                            questions, total_questions, current_question_index)
+    VALUES ({p1}, {p2}, {p3}, {p4}, {p5}, {p6}, {p7}, {p8}, {p9}, 0)
+"""
+
+_COMPLETE_INTERVIEW = "UPDATE interviews SET status = {p1} WHERE id = {p2}"
+
+# The report renders from the session document and question list only
+_SELECT_REPORT = "SELECT session_data, questions FROM interviews WHERE id = {p1}"
+
+_SELECT_EVALUATIONS = """
+    SELECT question_id, deterministic_results, llm_results, final_score, status
+    FROM evaluations WHERE interview_id = {p1}
+    ORDER BY created_at
+"""
+
+# Evaluations that could not finish still get a row so they stop counting as pending
+_INSERT_FAILED_EVALUATION = """
+    INSERT INTO evaluations (id, interview_id, question_id, deterministic_results, status)
+    VALUES ({p1}, {p2}, {p3}, {p4}, 'failed')
+    ON CONFLICT (id) DO NOTHING
+"""
+
+def _compile(template: str, placeholder: str) -> str:
+    """Substitute positional placeholders ({p1}, {p2}, ...) for a dialect"""
+    return template.format(**{f"p{i}": placeholder % i for i in range(1, 10)})
+
+POSTGRES_QUERIES = InterviewQueries(
+    insert_interview=_compile(_INSERT_INTERVIEW, "$%d"),
+    select_next_question="""
+        SELECT CASE WHEN status <> 'completed' AND current_question_index < total_questions
+                    THEN questions -> current_question_index END AS question,
+               current_question_index, total_questions, status,
+               (SELECT COUNT(*) FROM evaluations WHERE interview_id = interviews.id) AS evaluated_count
+        FROM interviews WHERE id = $1
+    """,
+    complete_interview=_compile(_COMPLETE_INTERVIEW, "$%d"),
+    select_current_question="""
+        SELECT current_question_index, questions -> current_question_index AS current_question
+        FROM interviews WHERE id = $1
+    """,
+    append_answer="""
+        UPDATE interviews
+        SET session_data = jsonb_set(session_data, '{answers}', (session_data->'answers') || jsonb_build_array($1::jsonb)),
+            current_question_index = current_question_index + 1,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = $2 AND current_question_index = $3
+    """,
+    select_report=_compile(_SELECT_REPORT, "$%d"),
+    select_evaluations=_compile(_SELECT_EVALUATIONS, "$%d"),
+    insert_evaluation="""
+        INSERT INTO evaluations (id, interview_id, question_id, deterministic_results, llm_results, final_score, status)
+        VALUES ($1, $2, $3, $4, $5, $6::float8, 'completed')
+    """,
+    insert_failed_evaluation=_compile(_INSERT_FAILED_EVALUATION, "$%d"),
+)
+
+SQLITE_QUERIES = InterviewQueries(
+    insert_interview=_compile(_INSERT_INTERVIEW, "?%d"),
+    select_next_question="""
+        SELECT CASE WHEN status <> 'completed' AND current_question_index < total_questions
+                    THEN json_extract(questions, '$[' || current_question_index || ']') END AS question,
+               current_question_index, total_questions, status,
+               (SELECT COUNT(*) FROM evaluations WHERE interview_id = interviews.id) AS evaluated_count
+        FROM interviews WHERE id = ?1
+    """,
+    complete_interview=_compile(_COMPLETE_INTERVIEW, "?%d"),
+    select_current_question="""
+        SELECT current_question_index, json_extract(questions, '$[' || current_question_index || ']') AS current_question
+        FROM interviews WHERE id = ?1
+    """,
+    append_answer="""
+        UPDATE interviews
+        SET session_data = json_insert(session_data, '$.answers[#]', json(?1)),
+            current_question_index = current_question_index + 1,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = ?2 AND current_question_index = ?3
+    """,
+    select_report=_compile(_SELECT_REPORT, "?%d"),
+    select_evaluations=_compile(_SELECT_EVALUATIONS, "?%d"),
+    insert_evaluation="""
+        INSERT INTO evaluations (id, interview_id, question_id, deterministic_results, llm_results, final_score, status)
+        VALUES (?1, ?2, ?3, ?4, ?5, ?6, 'completed')
+    """,
+    insert_failed_evaluation=_compile(_INSERT_FAILED_EVALUATION, "?%d"),
+)
@@ -1,6 +1,7 @@
 """
 Deterministic Excel evaluation using openpyxl and validation rules
 """
+import asyncio
 import logging
 import os
 from typing import Dict, List, Any, Optional
@@ -8,10 +9,16 @@ import openpyxl
 from openpyxl.utils import get_column_letter
 import re
 import json
+import zipfile
+import xml.etree.ElementTree as ET
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Precompiled patterns for formula checks
+_FUNC_RE = re.compile(r'[A-Z]+\(')
+_CELL_RE = re.compile(r'([A-Z]+)([0-9]+)')
+
 class DeterministicEvaluator:
     """Handles deterministic evaluation of Excel submissions"""
     
@@ -50,8 +57,13 @@ class DeterministicEvaluator:
                 "confidence": 0.5
             }
     
+    async def evaluate_answer_async(self, question: Dict[str, Any], answer_text: str, file_path: Optional[str] = None) -> Dict[str, Any]:
+        """Run evaluate_answer in a worker thread so workbook parsing never blocks the event loop"""
+        return await asyncio.to_thread(self.evaluate_answer, question, answer_text, file_path)
+    
     def _evaluate_formula(self, question: Dict[str, Any], formula_text: str) -> Dict[str, Any]:
         """Evaluate formula-based questions"""
+        golden = question.get("golden_answer") or {}
         tests = []
         passed = 0
         
@@ -63,8 +75,8 @@ class DeterministicEvaluator:
             tests.append("✗ Formula contains syntax errors")
         
         # Test 2: Required functions check
-        if "golden_answer" in question and "required_functions" in question["golden_answer"]:
-            required_functions = question["golden_answer"]["required_functions"]
+        if "required_functions" in golden:
+            required_functions = golden["required_functions"]
             if self._check_required_functions(formula_text, required_functions):
                 tests.append("✓ Uses required functions")
                 passed += 1
@@ -91,47 +103,60 @@ class DeterministicEvaluator:
     
     def _evaluate_workbook(self, question: Dict[str, Any], file_path: str) -> Dict[str, Any]:
         """Evaluate uploaded Excel workbook"""
+        golden = question.get("golden_answer") or {}
+        required_sheets = golden.get("required_sheets", ())
+        requires_pivot = golden.get("requires_pivot", False)
+        expected_values = golden.get("expected_values", {})
+        check_data_cleaning = golden.get("check_data_cleaning", False)
         tests = []
         passed = 0
         
         try:
-            workbook = openpyxl.load_workbook(file_path, data_only=True)
+            # Structural checks only need the package listing and workbook.xml
+            scan = self._quick_scan(file_path)
             
             # Test 1: Required sheets exist
-            required_sheets = question.get("golden_answer", {}).get("required_sheets", [])
             for sheet_name in required_sheets:
-                if sheet_name in workbook.sheetnames:
+                if sheet_name in scan["sheet_names"]:
                     tests.append(f"✓ Sheet '{sheet_name}' exists")
                     passed += 1
                 else:
                     tests.append(f"✗ Missing required sheet: {sheet_name}")
             
             # Test 2: Pivot tables check
-            if question.get("golden_answer", {}).get("requires_pivot", False):
-                if self._check_pivot_tables(workbook):
+            if requires_pivot:
+                if scan["has_pivots"]:
                     tests.append("✓ Contains pivot table(s)")
                     passed += 1
                 else:
                     tests.append("✗ No pivot tables found")
             
-            # Test 3: Specific cell values
-            expected_values = question.get("golden_answer", {}).get("expected_values", {})
-            for sheet_cell, expected_value in expected_values.items():
-                if self._check_cell_value(workbook, sheet_cell, expected_value):
-                    tests.append(f"✓ Correct value in {sheet_cell}")
-                    passed += 1
-                else:
-                    tests.append(f"✗ Incorrect value in {sheet_cell}")
-            
-            # Test 4: Data validation
-            if question.get("golden_answer", {}).get("check_data_cleaning", False):
-                if self._check_data_cleaning(workbook):
-                    tests.append("✓ Data appears cleaned")
-                    passed += 1
-                else:
-                    tests.append("✗ Data cleaning issues detected")
-            
-            workbook.close()
+            # Only pay for a full openpyxl load when cell contents are needed
+            if expected_values or check_data_cleaning:
+                # Read-only mode streams the sheet XML instead of building mutable cell objects
+                workbook = openpyxl.load_workbook(file_path, data_only=True, read_only=True, keep_links=False)
+                try:
+                    # Test 3: Specific cell values
+                    sheets = {}  # each referenced sheet is looked up once
+                    for sheet_cell, expected_value in expected_values.items():
+                        sheet_name, _, cell_ref = sheet_cell.rpartition('!')
+                        if sheet_name not in sheets:
+                            sheets[sheet_name] = workbook[sheet_name] if sheet_name in workbook.sheetnames else None
+                        if self._check_cell_value(sheets[sheet_name], cell_ref, expected_value):
+                            tests.append(f"✓ Correct value in {sheet_cell}")
+                            passed += 1
+                        else:
+                            tests.append(f"✗ Incorrect value in {sheet_cell}")
+                    
+                    # Test 4: Data validation
+                    if check_data_cleaning:
+                        if self._check_data_cleaning(workbook):
+                            tests.append("✓ Data appears cleaned")
+                            passed += 1
+                        else:
+                            tests.append("✗ Data cleaning issues detected")
+                finally:
+                    workbook.close()
             
         except Exception as e:
             tests.append(f"✗ Error opening workbook: {str(e)}")
@@ -149,8 +174,11 @@ class DeterministicEvaluator:
     
     def _evaluate_mcq(self, question: Dict[str, Any], answer: str) -> Dict[str, Any]:
         """Evaluate multiple choice questions"""
-        correct_answer = question.get("golden_answer", {}).get("correct_option", "")
-        is_correct = answer.strip().upper() == correct_answer.upper()
+        golden = question.get("golden_answer") or {}
+        correct_answer = golden.get("correct_option_norm")
+        if correct_answer is None:
+            correct_answer = golden.get("correct_option", "").strip().casefold()
+        is_correct = answer.strip().casefold() == correct_answer
         
         return {
             "passed_tests": 1 if is_correct else 0,
@@ -173,8 +201,9 @@ class DeterministicEvaluator:
             tests.append("✗ Answer too brief")
         
         # Test 2: Contains key terms
-        key_terms = question.get("golden_answer", {}).get("key_terms", [])
-        found_terms = sum(1 for term in key_terms if term.lower() in answer.lower())
+        key_terms = (question.get("golden_answer") or {}).get("key_terms", ())
+        answer_lower = answer.lower()
+        found_terms = sum(1 for term in key_terms if term.lower() in answer_lower)
         if found_terms >= len(key_terms) * 0.5:  # At least 50% of key terms
             tests.append("✓ Contains relevant terminology")
             passed += 1
@@ -205,8 +234,7 @@ class DeterministicEvaluator:
             return False
         
         # Check for basic Excel functions pattern
-        function_pattern = r'[A-Z]+\('
-        if not re.search(function_pattern, formula.upper()):
+        if not _FUNC_RE.search(formula.upper()):
             # Allow simple formulas without functions
             pass
         
@@ -219,45 +247,48 @@ class DeterministicEvaluator:
     
     def _validate_cell_references(self, formula: str) -> bool:
         """Validate cell references in formula"""
-        cell_pattern = r'[A-Z]+[0-9]+'
-        references = re.findall(cell_pattern, formula.upper())
-        
         # Basic validation - ensure references look reasonable
-        for ref in references:
-            col_part = re.match(r'[A-Z]+', ref).group()
-            row_part = int(re.search(r'[0-9]+', ref).group())
+        for match in _CELL_RE.finditer(formula.upper()):
+            col_part, row_part = match.groups()
             
-            if len(col_part) > 3 or row_part > 1048576:  # Excel limits
+            if len(col_part) > 3 or int(row_part) > 1048576:  # Excel limits
                 return False
         
         return True
     
-    def _check_pivot_tables(self, workbook) -> bool:
-        """Check if workbook contains pivot tables"""
-        for sheet in workbook.worksheets:
-            if hasattr(sheet, '_pivots') and sheet._pivots:
-                return True
-        return False
+    def _quick_scan(self, file_path: str) -> Dict[str, Any]:
+        """Read sheet names and pivot presence straight from the .xlsx package"""
+        with zipfile.ZipFile(file_path) as archive:
+            has_pivots = any(name.startswith('xl/pivotTables/') for name in archive.namelist())
+            with archive.open('xl/workbook.xml') as f:
+                sheet_names = [
+                    elem.get('name') for _, elem in ET.iterparse(f)
+                    if elem.tag.endswith('}sheet')
+                ]
+        return {"sheet_names": sheet_names, "has_pivots": has_pivots}
     
-    def _check_cell_value(self, workbook, sheet_cell: str, expected_value) -> bool:
+    def _check_cell_value(self, sheet, cell_ref: str, expected_value) -> bool:
         """Check if specific cell contains expected value"""
+        if sheet is None or not cell_ref:
+            return False
         try:
-            parts = sheet_cell.split('!')
-            if len(parts) == 2:
-                sheet_name, cell_ref = parts
-                if sheet_name in workbook.sheetnames:
-                    sheet = workbook[sheet_name]
-                    cell_value = sheet[cell_ref].value
-                    return str(cell_value) == str(expected_value)
-        except:
-            pass
-        return False
+            cell_value = sheet[cell_ref].value
+        except Exception:
+            return False
+        
+        # Booleans only match booleans; Python would otherwise treat TRUE as equal to 1
+        if isinstance(expected_value, bool) != isinstance(cell_value, bool):
+            return False
+        # Compare numbers by value so 1.0 matches 1 (but not the string "1")
+        if isinstance(expected_value, (int, float)) and isinstance(cell_value, (int, float)):
+            return abs(cell_value - expected_value) < 1e-9
+        return cell_value == expected_value
     
     def _check_data_cleaning(self, workbook) -> bool:
         """Basic check for data cleaning indicators"""
         # This is a simplified check - look for consistent formatting
         for sheet in workbook.worksheets:
-            if sheet.max_row > 1:  # Has data beyond headers
+            if (sheet.max_row or 0) > 1:  # Has data beyond headers
                 # Check for empty rows/cells that might indicate cleaning
                 return True
         return False
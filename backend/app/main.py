@@ -5,11 +5,16 @@ import os
 import logging
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import QueryParams
+from starlette.types import Receive, Scope, Send
 from contextlib import asynccontextmanager
 
 from app.config import settings
-from app.db.postgres import init_db
+from app.db.postgres import init_db, close_db
+from app.evaluator.llm_eval import LLMEvaluator, get_http_client, close_http_client
 from app.api.interviews import router as interviews_router
 from app.api.admin import router as admin_router
 
@@ -23,26 +28,47 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting Excel Mock Interviewer API...")
     await init_db()
+    app.state.http_client = get_http_client()
+    app.state.llm = LLMEvaluator(client=app.state.http_client)
     yield
     # Shutdown
     logger.info("Shutting down...")
+    await close_http_client()
+    await close_db()
 
 app = FastAPI(
     title="Excel Mock Interviewer API",
     description="AI-powered Excel interview system with deterministic and LLM evaluation",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
-# CORS middleware
+# CORS middleware; only the verbs and headers the API actually uses, no cookies,
+# and preflight results cached by the browser for an hour
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"] if settings.mock_mode else ["http://localhost:8501"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_credentials=False,
+    allow_methods=["GET", "POST"],
+    allow_headers=["authorization", "content-type"],
+    max_age=3600,
 )
 
+class ReportGZipMiddleware(GZipMiddleware):
+    """GZip middleware that passes PDF reports through uncompressed"""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # PDF streams are already deflate-compressed, so gzipping them only burns CPU
+        if scope["type"] == "http" and scope["path"].endswith("/report"):
+            if QueryParams(scope["query_string"]).get("format", "").lower() == "pdf":
+                await self.app(scope, receive, send)
+                return
+        await super().__call__(scope, receive, send)
+
+# Compress larger responses (HTML reports); clients that don't send Accept-Encoding get plain bodies
+app.add_middleware(ReportGZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Include routers
 app.include_router(interviews_router, prefix="/api/v1", tags=["interviews"])
 app.include_router(admin_router, prefix="/api/v1/admin", tags=["admin"])
@@ -0,0 +1,116 @@
+"""
+File upload storage and report output helpers
+"""
+import asyncio
+import html
+import logging
+import os
+import tempfile
+from typing import Dict, Any, List
+
+from fastapi import HTTPException, UploadFile
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Read uploads in 1 MiB chunks; small chunks make multi-MB workbooks pathologically slow
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+async def save_uploaded_file(file: UploadFile, interview_id: str, question_id: str) -> str:
+    """Stream an uploaded file to the upload directory and return its path"""
+    target_dir = os.path.join(settings.upload_dir, interview_id)
+    os.makedirs(target_dir, exist_ok=True)
+    
+    filename = os.path.basename(file.filename or "upload.xlsx")
+    target_path = os.path.join(target_dir, f"{question_id}_{filename}")
+    
+    # Write into a temp file next to the target so the final move is an atomic rename
+    tmp = tempfile.NamedTemporaryFile(dir=target_dir, suffix=".part", delete=False)
+    size = 0
+    try:
+        with tmp:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > settings.max_file_size:
+                    raise HTTPException(status_code=413, detail="Uploaded file is too large")
+                tmp.write(chunk)
+        os.replace(tmp.name, target_path)
+    except BaseException:
+        os.unlink(tmp.name)
+        raise
+    
+    logger.info(f"Saved upload for interview {interview_id} ({size} bytes) to {target_path}")
+    return target_path
+
+async def generate_report(session_data: Dict[str, Any], evaluations: List[Dict[str, Any]], format: str = "html") -> str:
+    """Render the interview report; returns HTML, or the PDF file path for format="pdf"."""
+    # Rendering (and weasyprint in particular) is CPU-bound, keep it off the event loop
+    return await asyncio.to_thread(generate_report_sync, session_data, evaluations, format)
+
+def generate_report_sync(session_data: Dict[str, Any], evaluations: List[Dict[str, Any]], format: str = "html") -> str:
+    """Blocking report renderer used by generate_report"""
+    report_html = _render_report_html(session_data, evaluations)
+    
+    if format.lower() != "pdf":
+        return report_html
+    
+    from weasyprint import HTML
+    
+    report_dir = os.path.join(settings.upload_dir, "reports")
+    os.makedirs(report_dir, exist_ok=True)
+    pdf_path = os.path.join(report_dir, f"{session_data['interview_id']}.pdf")
+    HTML(string=report_html).write_pdf(pdf_path)
+    return pdf_path
+
+def _render_report_html(session_data: Dict[str, Any], evaluations: List[Dict[str, Any]]) -> str:
+    """Build the report HTML from the session and its evaluation rows"""
+    evaluations_by_question = {e["question_id"]: e for e in evaluations}
+    answers_by_question = {a["question_id"]: a for a in session_data.get("answers", [])}
+    
+    rows = []
+    scores = []
+    for index, question in enumerate(session_data.get("questions", []), start=1):
+        answer = answers_by_question.get(question["id"], {})
+        evaluation = evaluations_by_question.get(question["id"], {})
+        llm_results = evaluation.get("llm_results") or {}
+        
+        final_score = evaluation.get("final_score")
+        if final_score is not None:
+            scores.append(float(final_score))
+        
+        rows.append(f"""
+        <tr>
+            <td>{index}</td>
+            <td>{html.escape(question.get("text", ""))}</td>
+            <td>{html.escape(answer.get("answer_text", "Not answered"))}</td>
+            <td>{"-" if final_score is None else f"{float(final_score):.2f}"}</td>
+            <td>{html.escape(llm_results.get("verdict", evaluation.get("status", "pending")))}</td>
+            <td>{html.escape(llm_results.get("notes", ""))}</td>
+        </tr>""")
+    
+    overall = f"{sum(scores) / len(scores):.2f} / 4.00" if scores else "Pending"
+    
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>Excel Interview Report</title>
+    <style>
+        body {{ font-family: Arial, sans-serif; margin: 24px; }}
+        table {{ border-collapse: collapse; width: 100%; }}
+        th, td {{ border: 1px solid #ccc; padding: 8px; text-align: left; vertical-align: top; }}
+        th {{ background: #f0f0f0; }}
+    </style>
+</head>
+<body>
+    <h1>Excel Interview Report</h1>
+    <p><strong>Candidate:</strong> {html.escape(session_data.get("candidate_name", ""))}</p>
+    <p><strong>Role:</strong> {html.escape(session_data.get("role", ""))} &middot;
+       <strong>Difficulty:</strong> {html.escape(session_data.get("difficulty", ""))}</p>
+    <p><strong>Overall score:</strong> {overall}</p>
+    <table>
+        <tr><th>#</th><th>Question</th><th>Answer</th><th>Score</th><th>Verdict</th><th>Notes</th></tr>{"".join(rows)}
+    </table>
+</body>
+</html>"""
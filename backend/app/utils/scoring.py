@@ -0,0 +1,84 @@
+"""
+Question bank loading and selection
+"""
+import logging
+from functools import lru_cache
+from typing import Dict, Any, Optional, Tuple
+
+import orjson
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Difficulty names used by the frontend mapped to question bank levels
+DIFFICULTY_LEVELS = {
+    "basic": "basic",
+    "medium": "intermediate",
+    "advanced": "advanced"
+}
+
+# LLM rubric dimensions, each scored 0-4
+RUBRIC_FIELDS = ("correctness", "explanation", "efficiency", "robustness")
+
+@lru_cache(maxsize=1)
+def _read_question_bank() -> Tuple[Dict[str, Any], ...]:
+    """Read and normalize the question bank file"""
+    with open(settings.questions_file, "rb") as f:
+        questions = orjson.loads(f.read()).get("questions", [])
+    
+    # Normalize MCQ answers once here instead of on every evaluation
+    for q in questions:
+        golden = q.get("golden_answer")
+        if q.get("type") == "mcq" and golden and "correct_option" in golden:
+            golden["correct_option_norm"] = golden["correct_option"].strip().casefold()
+    
+    return tuple(questions)
+
+@lru_cache(maxsize=1)
+def _question_index() -> Dict[str, Dict[str, Any]]:
+    """Question bank keyed by question id"""
+    return {q["id"]: q for q in _read_question_bank()}
+
+@lru_cache(maxsize=64)
+def _load_question_pool(role: str, difficulty: str) -> Tuple[Dict[str, Any], ...]:
+    """Order the question bank for a role/difficulty pair.
+
+    The result is cached and shared between requests, so callers must treat
+    the returned question dicts as read-only.
+    """
+    questions = [q for q in _read_question_bank() if role in q.get("roles", (role,))]
+    level = DIFFICULTY_LEVELS.get(difficulty, difficulty)
+    
+    # Questions at the requested level come first, the rest of the bank fills up the interview
+    matching = [q for q in questions if q.get("level") == level]
+    others = [q for q in questions if q.get("level") != level]
+    
+    logger.info(f"Loaded {len(questions)} questions for role={role} difficulty={difficulty}")
+    return tuple(matching + others)
+
+def _clear_question_caches():
+    _read_question_bank.cache_clear()
+    _question_index.cache_clear()
+    _load_question_pool.cache_clear()
+
+def load_questions(role: str, difficulty: str) -> Tuple[Dict[str, Any], ...]:
+    """Return the question pool for a role and difficulty"""
+    if settings.debug:
+        # Pick up edits to the question bank without restarting
+        _clear_question_caches()
+    return _load_question_pool(role, difficulty)
+
+def get_question(question_id: str) -> Optional[Dict[str, Any]]:
+    """Look up a single question from the bank by id"""
+    if settings.debug:
+        _clear_question_caches()
+    return _question_index().get(question_id)
+
+def calculate_final_score(deterministic_results: Dict[str, Any], llm_results: Dict[str, Any]) -> float:
+    """Blend deterministic and LLM results into a 0-4 score"""
+    deterministic_score = deterministic_results.get("score", 0.0) * 4
+    llm_score = sum(llm_results.get(field, 0.0) for field in RUBRIC_FIELDS) / len(RUBRIC_FIELDS)
+    
+    final_score = settings.deterministic_weight * deterministic_score + settings.llm_weight * llm_score
+    return round(max(0.0, min(4.0, final_score)), 2)
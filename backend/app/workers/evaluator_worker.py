@@ -0,0 +1,249 @@
+"""
+Evaluation jobs: deterministic checks on a CPU-bound queue, LLM grading on an I/O-bound queue
+"""
+import asyncio
+import logging
+import os
+import sys
+import uuid
+from typing import Dict, Any, Optional
+
+from redis import Redis
+from rq import Queue, SimpleWorker, Worker, get_current_job
+from rq.exceptions import NoSuchJobError
+from rq.job import Job
+from rq.worker_pool import WorkerPool
+
+from app.config import settings
+from app.db.postgres import init_db, get_db_session, get_queries
+from app.evaluator.deterministic import DeterministicEvaluator
+from app.evaluator.llm_eval import DetSummary, LLMEvaluator
+from app.utils.scoring import get_question, calculate_final_score
+
+try:
+    import uvloop
+except ImportError:  # uvloop is unavailable on Windows; fall back to the default loop
+    uvloop = None
+
+logger = logging.getLogger(__name__)
+
+# Workbook parsing and regex checks saturate a core; LLM calls mostly wait on the network.
+# Separate queues keep slow workbooks from holding up LLM calls and vice versa.
+CPU_QUEUE = "cpu"
+IO_QUEUE = "io"
+
+_redis: Optional[Redis] = None
+_runner: Optional[asyncio.Runner] = None
+_db_ready = False
+_llm: Optional[LLMEvaluator] = None
+
+# Inline evaluations started without Redis, by evaluation id; held so they aren't garbage collected mid-run
+_inline_tasks: Dict[str, asyncio.Task] = {}
+
+def _get_redis() -> Redis:
+    global _redis
+    if _redis is None:
+        _redis = Redis.from_url(settings.redis_url)
+    return _redis
+
+def _get_llm() -> LLMEvaluator:
+    """Return this process's evaluator, creating it on first use"""
+    global _llm
+    if _llm is None:
+        _llm = LLMEvaluator()
+    return _llm
+
+async def enqueue_evaluation(
+    interview_id: str,
+    question_id: str,
+    answer_data: Dict[str, Any],
+    llm: Optional[LLMEvaluator] = None
+) -> str:
+    """Queue evaluation of a submitted answer and return its job id
+
+    llm is only used when evaluating inline; queued jobs use the worker's own evaluator.
+    """
+    if not settings.redis_url:
+        # No queue configured (local/mock mode): evaluate in the API process
+        evaluation_id = str(uuid.uuid4())
+        task = asyncio.create_task(_evaluate_inline(evaluation_id, interview_id, question_id, answer_data, llm))
+        _inline_tasks[evaluation_id] = task
+        task.add_done_callback(lambda _: _inline_tasks.pop(evaluation_id, None))
+        return evaluation_id
+    
+    # rq's client is synchronous; keep the Redis round-trips off the event loop
+    return await asyncio.to_thread(_enqueue_jobs, interview_id, question_id, answer_data)
+
+async def cancel_evaluation(evaluation_id: str):
+    """Withdraw an evaluation whose answer was never recorded"""
+    if not settings.redis_url:
+        task = _inline_tasks.get(evaluation_id)
+        if task is not None:
+            task.cancel()
+        return
+    
+    await asyncio.to_thread(_cancel_jobs, evaluation_id)
+
+def _cancel_jobs(evaluation_id: str):
+    # Cancelling the I/O job is what matters: rq never enqueues a cancelled dependent,
+    # so no evaluation row gets written even if the deterministic job already started
+    redis = _get_redis()
+    for job_id in (evaluation_id, f"{evaluation_id}-det"):
+        try:
+            Job.fetch(job_id, connection=redis).cancel()
+        except NoSuchJobError:
+            pass
+        except Exception as e:
+            logger.warning(f"Could not cancel job {job_id}: {e}")
+    logger.info(f"Cancelled evaluation {evaluation_id}")
+
+def _enqueue_jobs(interview_id: str, question_id: str, answer_data: Dict[str, Any]) -> str:
+    evaluation_id = str(uuid.uuid4())
+    redis = _get_redis()
+    
+    deterministic_job = Queue(CPU_QUEUE, connection=redis).enqueue(
+        run_deterministic_evaluation, question_id, answer_data,
+        job_id=f"{evaluation_id}-det",
+        # rq's default 500s result TTL is shorter than a rate-limited I/O backlog can be;
+        # the LLM job deletes this job once it has read the result
+        result_ttl=settings.deterministic_result_ttl,
+        meta={"evaluation_id": evaluation_id, "interview_id": interview_id},
+        on_failure=_on_deterministic_failure
+    )
+    Queue(IO_QUEUE, connection=redis).enqueue(
+        run_llm_evaluation, evaluation_id, interview_id, question_id, answer_data,
+        job_id=evaluation_id,
+        depends_on=deterministic_job
+    )
+    
+    logger.info(f"Enqueued evaluation {evaluation_id} for interview {interview_id}, question {question_id}")
+    return evaluation_id
+
+def run_deterministic_evaluation(question_id: str, answer_data: Dict[str, Any]) -> Dict[str, Any]:
+    """CPU queue job: run the deterministic checks for one answer"""
+    question = get_question(question_id)
+    if question is None:
+        raise ValueError(f"Unknown question: {question_id}")
+    
+    return DeterministicEvaluator().evaluate_answer(
+        question, answer_data["answer_text"], answer_data.get("file_path")
+    )
+
+def _on_deterministic_failure(job, connection, exc_type, exc_value, traceback):
+    """rq failure callback: the dependent LLM job will never run, so record the failure from the I/O queue"""
+    evaluation_id = job.meta["evaluation_id"]
+    Queue(IO_QUEUE, connection=connection).enqueue(
+        record_failed_evaluation, evaluation_id, job.meta["interview_id"], job.args[0],
+        f"Deterministic evaluation failed: {exc_value}",
+        job_id=f"{evaluation_id}-failed"
+    )
+
+def run_llm_evaluation(evaluation_id: str, interview_id: str, question_id: str, answer_data: Dict[str, Any]):
+    """I/O queue job: grade with the LLM and store the combined evaluation"""
+    deterministic_job = get_current_job().dependency
+    deterministic_results = deterministic_job.return_value()
+    _run(_ensure_db())
+    try:
+        _run(_complete_evaluation(evaluation_id, interview_id, question_id, answer_data, deterministic_results))
+    except Exception as e:
+        _run(_record_failure(evaluation_id, interview_id, question_id, f"Evaluation failed: {e}"))
+        raise
+    finally:
+        deterministic_job.delete()
+
+def record_failed_evaluation(evaluation_id: str, interview_id: str, question_id: str, error: str):
+    """I/O queue job: store a failed evaluation row"""
+    _run(_ensure_db())
+    _run(_record_failure(evaluation_id, interview_id, question_id, error))
+
+def _run(coro):
+    """Run a coroutine on this worker process's persistent event loop"""
+    global _runner
+    if _runner is None:
+        _runner = asyncio.Runner(loop_factory=uvloop.new_event_loop if uvloop else None)
+    return _runner.run(coro)
+
+async def _ensure_db():
+    """Initialize the database once per worker process, with a small pool and no DDL"""
+    global _db_ready
+    if not _db_ready:
+        await init_db(
+            pool_min_size=settings.worker_db_pool_min_size,
+            pool_max_size=settings.worker_db_pool_max_size,
+            create_schema=False
+        )
+        _db_ready = True
+
+async def _evaluate_inline(
+    evaluation_id: str,
+    interview_id: str,
+    question_id: str,
+    answer_data: Dict[str, Any],
+    llm: Optional[LLMEvaluator] = None
+):
+    try:
+        # Runs on the API's event loop, so the CPU-bound checks go to a thread
+        question = get_question(question_id)
+        deterministic_results = await DeterministicEvaluator().evaluate_answer_async(
+            question, answer_data["answer_text"], answer_data.get("file_path")
+        )
+        await _complete_evaluation(evaluation_id, interview_id, question_id, answer_data, deterministic_results, llm)
+    except Exception as e:
+        logger.error(f"Inline evaluation {evaluation_id} failed: {e}")
+        await _record_failure(evaluation_id, interview_id, question_id, f"Evaluation failed: {e}")
+
+async def _record_failure(evaluation_id: str, interview_id: str, question_id: str, error: str):
+    """Store a failed evaluation so the answer no longer counts as pending"""
+    try:
+        async with get_db_session() as db:
+            await db.execute(
+                get_queries().insert_failed_evaluation,
+                evaluation_id, interview_id, question_id, {"error": error}
+            )
+    except Exception as e:
+        logger.error(f"Could not record failed evaluation {evaluation_id}: {e}")
+
+async def _complete_evaluation(
+    evaluation_id: str,
+    interview_id: str,
+    question_id: str,
+    answer_data: Dict[str, Any],
+    deterministic_results: Dict[str, Any],
+    llm: Optional[LLMEvaluator] = None
+):
+    question = get_question(question_id)
+    
+    llm_results = await (llm or _get_llm()).evaluate_answer(
+        question, answer_data["answer_text"], DetSummary(deterministic_results)
+    )
+    
+    final_score = calculate_final_score(deterministic_results, llm_results)
+    
+    async with get_db_session() as db:
+        await db.execute(
+            get_queries().insert_evaluation,
+            evaluation_id, interview_id, question_id, deterministic_results, llm_results, final_score
+        )
+    
+    logger.info(f"Evaluation {evaluation_id} completed with score {final_score}")
+
+def main():
+    """Start a pool of workers for the queues named on the command line"""
+    logging.basicConfig(level=logging.INFO)
+    queues = sys.argv[1:] or [CPU_QUEUE, IO_QUEUE]
+    
+    if queues == [CPU_QUEUE]:
+        # One forked process per core; a fresh work horse per job keeps openpyxl memory in check
+        worker_class = Worker
+        num_workers = settings.cpu_worker_count or os.cpu_count() or 1
+    else:
+        # Non-forking workers keep the event loop, DB pool and HTTP connections alive between jobs
+        worker_class = SimpleWorker
+        num_workers = settings.io_worker_count
+    
+    logger.info(f"Starting {num_workers} {worker_class.__name__}(s) for queues {queues}")
+    pool = WorkerPool(queues, connection=_get_redis(), num_workers=num_workers, worker_class=worker_class)
+    pool.start()
+
+if __name__ == "__main__":
+    main()
@@ -3,14 +3,33 @@ Streamlit frontend for Excel Mock Interviewer
 """
 import streamlit as st
 import requests
+import io
 import json
-import time
 from typing import Dict, Any
 import os
 
 # Configuration
 API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
 
+# Display lookups, built once rather than on every rerun
+_TYPE_BADGES = {
+    "Formula": "🧮 **Formula Question**",
+    "Practical": "📊 **Practical Exercise**",
+    "Mcq": "❓ **Multiple Choice**"
+}
+_DEFAULT_BADGE = "💬 **Explanation Question**"
+
+_ROLE_LABELS = {
+    "finance": "Finance & Accounting",
+    "data": "Data Analysis",
+    "ops": "Operations & Business"
+}
+_DIFFICULTY_LABELS = {
+    "medium": "Medium",
+    "basic": "Basic",
+    "advanced": "Advanced"
+}
+
 def init_session_state():
     """Initialize session state variables"""
     if "interview_id" not in st.session_state:
@@ -21,11 +40,20 @@ def init_session_state():
         st.session_state.interview_status = "not_started"
     if "progress" not in st.session_state:
         st.session_state.progress = {"current": 0, "total": 6}
+    if "pending_evaluations" not in st.session_state:
+        st.session_state.pending_evaluations = 0
+    if "http" not in st.session_state:
+        # One keep-alive session per browser session instead of a new connection per call
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=8, pool_maxsize=16)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        st.session_state.http = session
 
 def create_interview(candidate_name: str, role: str, difficulty: str) -> Dict[str, Any]:
     """Create a new interview session"""
     try:
-        response = requests.post(
+        response = st.session_state.http.post(
             f"{API_BASE_URL}/api/v1/interviews",
             json={
                 "candidate_name": candidate_name,
@@ -48,7 +76,7 @@ def create_interview(candidate_name: str, role: str, difficulty: str) -> Dict[st
 def get_next_question(interview_id: str) -> Dict[str, Any]:
     """Get the next question or completion status"""
     try:
-        response = requests.get(
+        response = st.session_state.http.get(
             f"{API_BASE_URL}/api/v1/interviews/{interview_id}/next",
             timeout=10
         )
@@ -72,14 +100,15 @@ def submit_answer(interview_id: str, answer_text: str, uploaded_file=None) -> Di
         
         data = {"answer_text": answer_text}
         
-        response = requests.post(
+        response = st.session_state.http.post(
             f"{API_BASE_URL}/api/v1/interviews/{interview_id}/answer",
             data=data,
             files=files,
             timeout=30
         )
         
-        if response.status_code == 200:
+        # 202 Accepted: the answer is stored and evaluation continues in the background
+        if response.ok:
             return response.json()
         else:
             st.error(f"Failed to submit answer: {response.text}")
@@ -92,20 +121,25 @@ def submit_answer(interview_id: str, answer_text: str, uploaded_file=None) -> Di
 def get_report(interview_id: str, format_type: str = "html") -> str:
     """Get the final report"""
     try:
-        response = requests.get(
+        with st.session_state.http.get(
             f"{API_BASE_URL}/api/v1/interviews/{interview_id}/report",
             params={"format": format_type},
+            headers={"Accept-Encoding": "gzip"},
+            stream=True,
             timeout=30
-        )
-        
-        if response.status_code == 200:
+        ) as response:
+            if response.status_code != 200:
+                st.error(f"Failed to get report: {response.text}")
+                return ""
+            
             if format_type == "html":
                 return response.text
-            else:
-                return response.content
-        else:
-            st.error(f"Failed to get report: {response.text}")
-            return ""
+            
+            # Copy the PDF in chunks rather than buffering it inside requests first
+            buffer = io.BytesIO()
+            for chunk in response.iter_content(chunk_size=65536):
+                buffer.write(chunk)
+            return buffer.getvalue()
             
     except requests.exceptions.RequestException as e:
         st.error(f"Connection error: {e}")
@@ -173,18 +207,14 @@ def show_welcome_screen():
             
             role = st.selectbox(
                 "Role Focus",
-                ["finance", "data", "ops"],
-                format_func=lambda x: {
-                    "finance": "Finance & Accounting",
-                    "data": "Data Analysis",
-                    "ops": "Operations & Business"
-                }[x]
+                list(_ROLE_LABELS),
+                format_func=_ROLE_LABELS.__getitem__
             )
             
             difficulty = st.selectbox(
                 "Difficulty Level",
-                ["medium", "basic", "advanced"],
-                format_func=lambda x: x.title()
+                list(_DIFFICULTY_LABELS),
+                format_func=_DIFFICULTY_LABELS.__getitem__
             )
             
             submitted = st.form_submit_button("Start Interview", use_container_width=True)
@@ -214,37 +244,43 @@ def show_welcome_screen():
         - Ask for clarification if needed
         """)
 
+def load_next_question() -> bool:
+    """Fetch the next question into session state; returns False if it could not be loaded"""
+    next_data = get_next_question(st.session_state.interview_id)
+    st.session_state.pending_evaluations = next_data.get("pending_evaluations", 0)
+    if next_data.get("status") == "completed":
+        st.session_state.current_question = None
+        st.session_state.interview_status = "completed"
+    elif "question" in next_data:
+        st.session_state.current_question = next_data["question"]
+        if "progress" in next_data:
+            st.session_state.progress = next_data["progress"]
+    else:
+        st.session_state.current_question = None
+        return False
+    return True
+
 def show_interview_screen():
     """Display current question and answer interface"""
     if not st.session_state.current_question:
         # Try to get next question
-        next_data = get_next_question(st.session_state.interview_id)
-        if next_data.get("status") == "completed":
-            st.session_state.interview_status = "completed"
-            st.rerun()
-        elif "question" in next_data:
-            st.session_state.current_question = next_data["question"]
-            if "progress" in next_data:
-                st.session_state.progress = next_data["progress"]
-        else:
+        if not load_next_question():
             st.error("Failed to load question. Please refresh the page.")
             return
+        if st.session_state.interview_status == "completed":
+            st.rerun()
     
     question = st.session_state.current_question
     
     # Question display
     st.header(f"Question {st.session_state.progress['current']}")
     
+    if st.session_state.pending_evaluations:
+        st.caption(f"⏳ {st.session_state.pending_evaluations} previous answer(s) still being evaluated")
+    
     # Question type badge
     question_type = question.get("type", "unknown").title()
-    if question_type == "Formula":
-        st.markdown("🧮 **Formula Question**")
-    elif question_type == "Practical":
-        st.markdown("📊 **Practical Exercise**")
-    elif question_type == "Mcq":
-        st.markdown("❓ **Multiple Choice**")
-    else:
-        st.markdown("💬 **Explanation Question**")
+    st.markdown(_TYPE_BADGES.get(question_type, _DEFAULT_BADGE))
     
     # Timer display
     time_limit = question.get("time_limit", 300)
@@ -295,11 +331,10 @@ def show_interview_screen():
                     )
                     
                     if result.get("evaluation_pending"):
-                        st.success("Answer submitted! Processing evaluation...")
-                        time.sleep(2)  # Brief pause for user feedback
-                        
-                        # Clear current question to trigger next question load
-                        st.session_state.current_question = None
+                        # Load the next question in this run rather than pausing and
+                        # fetching it on a second rerun; a failed load is retried on rerun
+                        load_next_question()
+                        st.toast("Answer submitted! Evaluating in the background...")
                         st.rerun()
 
 def show_report_screen():
@@ -307,6 +342,13 @@ def show_report_screen():
     st.header("📋 Interview Complete!")
     st.success("Congratulations! You've completed all questions.")
     
+    if st.session_state.pending_evaluations:
+        st.info("⏳ Some answers are still being evaluated. The report will include them once they finish.")
+        if st.button("Check Again"):
+            next_data = get_next_question(st.session_state.interview_id)
+            st.session_state.pending_evaluations = next_data.get("pending_evaluations", 0)
+            st.rerun()
+    
     col1, col2 = st.columns([1, 1])
     
     with col1:
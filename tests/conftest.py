@@ -0,0 +1,7 @@
+"""
+Make the backend package importable when running pytest from the repository root
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
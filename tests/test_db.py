@@ -0,0 +1,154 @@
+"""
+Tests for the SQLite session that mimics the asyncpg API
+"""
+import asyncio
+import json
+
+import aiosqlite
+import pytest
+import pytest_asyncio
+
+from app.db import postgres
+from app.db.postgres import SQLiteAdapter, SQLiteSession
+from app.db.queries import SQLITE_QUERIES
+
+async def _connect(path):
+    """Write and read connections set up the way init_db does"""
+    return await postgres._connect_sqlite_writer(path), await postgres._connect_sqlite_reader(path)
+
+@pytest_asyncio.fixture
+async def connections(tmp_path):
+    connection, read_connection = await _connect(str(tmp_path / "items.db"))
+    await connection.execute("CREATE TABLE items (id TEXT PRIMARY KEY, name TEXT, session_data TEXT)")
+    yield connection, read_connection
+    await read_connection.close()
+    await connection.close()
+
+@pytest.fixture
+def session(connections):
+    return SQLiteSession(*connections, asyncio.Lock())
+
+@pytest.mark.asyncio
+async def test_execute_returns_asyncpg_status(session):
+    assert await session.execute("INSERT INTO items (id, name) VALUES (?1, ?2)", "a", "x") == "INSERT 1"
+    assert await session.execute("UPDATE items SET name = ?1 WHERE id = ?2", "y", "missing") == "UPDATE 0"
+    assert await session.execute("update items SET name = ?1 WHERE id = ?2", "y", "a") == "UPDATE 1"
+
+@pytest.mark.asyncio
+async def test_json_arguments_round_trip(session):
+    data = {"answers": [1, "two"], "nested": {"ok": True}}
+    await session.execute("INSERT INTO items (id, name, session_data) VALUES (?1, ?2, ?3)", "a", "[1]", data)
+    row = await session.fetchrow("SELECT id, name, session_data FROM items WHERE id = ?1", "a")
+    # Only known JSON columns are decoded; other text stays as stored
+    assert row == {"id": "a", "name": "[1]", "session_data": data}
+
+@pytest.mark.asyncio
+async def test_list_and_tuple_arguments_encode_as_json_arrays(session):
+    await session.execute("INSERT INTO items (id, session_data) VALUES (?1, ?2)", "a", (1, 2))
+    await session.execute("INSERT INTO items (id, session_data) VALUES (?1, ?2)", "b", [3])
+    rows = await session.fetch("SELECT id, session_data FROM items ORDER BY id")
+    assert rows == [{"id": "a", "session_data": [1, 2]}, {"id": "b", "session_data": [3]}]
+
+@pytest.mark.asyncio
+async def test_null_json_column_and_missing_row(session):
+    await session.execute("INSERT INTO items (id) VALUES (?1)", "a")
+    assert (await session.fetchrow("SELECT session_data FROM items WHERE id = ?1", "a")) == {"session_data": None}
+    assert await session.fetchrow("SELECT * FROM items WHERE id = ?1", "missing") is None
+
+@pytest.mark.asyncio
+async def test_transaction_commits(session):
+    async with session.transaction():
+        await session.execute("INSERT INTO items (id) VALUES (?1)", "a")
+    assert len(await session.fetch("SELECT id FROM items")) == 1
+    assert not session.write_lock.locked()
+
+@pytest.mark.asyncio
+async def test_transaction_rolls_back_on_error(session):
+    with pytest.raises(RuntimeError):
+        async with session.transaction():
+            await session.execute("INSERT INTO items (id) VALUES (?1)", "a")
+            raise RuntimeError("boom")
+    assert await session.fetch("SELECT id FROM items") == []
+    assert not session.write_lock.locked()
+    # The session is usable again outside the transaction
+    assert await session.execute("INSERT INTO items (id) VALUES (?1)", "b") == "INSERT 1"
+
+@pytest.mark.asyncio
+async def test_reads_outside_a_transaction_only_see_committed_rows(connections):
+    adapter_lock = asyncio.Lock()
+    writer = SQLiteSession(*connections, adapter_lock)
+    reader = SQLiteSession(*connections, adapter_lock)
+    
+    with pytest.raises(RuntimeError):
+        async with writer.transaction():
+            await writer.execute("INSERT INTO items (id) VALUES (?1)", "a")
+            # The writer sees its own uncommitted row; another session does not
+            assert len(await writer.fetch("SELECT id FROM items")) == 1
+            assert await reader.fetch("SELECT id FROM items") == []
+            raise RuntimeError("roll back")
+    assert await reader.fetch("SELECT id FROM items") == []
+    
+    async with writer.transaction():
+        await writer.execute("INSERT INTO items (id) VALUES (?1)", "b")
+    assert await reader.fetch("SELECT id FROM items") == [{"id": "b"}]
+
+@pytest.mark.asyncio
+async def test_answer_is_recorded_once_per_question(tmp_path, monkeypatch):
+    monkeypatch.setattr(postgres, "_sqlite_db", str(tmp_path / "test.db"))
+    await postgres._create_sqlite_tables()
+    connection, read_connection = await _connect(postgres._sqlite_db)
+    try:
+        questions = [{"id": "q1", "text": "one"}, {"id": "q2", "text": "two"}]
+        async with SQLiteAdapter(connection, read_connection).acquire() as db:
+            await db.execute(SQLITE_QUERIES.insert_interview, "i1", "c1", "Ann", "data", "basic",
+                             {"answers": []}, "active", questions, len(questions))
+            
+            answer = {"question_id": "q1", "answer_text": "a"}
+            assert await db.execute(SQLITE_QUERIES.append_answer, answer, "i1", 0) == "UPDATE 1"
+            # A second submit for the same question index no longer matches
+            assert await db.execute(SQLITE_QUERIES.append_answer, answer, "i1", 0) == "UPDATE 0"
+            
+            row = await db.fetchrow(SQLITE_QUERIES.select_next_question, "i1")
+            assert row["question"] == questions[1]
+            assert (row["current_question_index"], row["total_questions"], row["evaluated_count"]) == (1, 2, 0)
+            
+            report = await db.fetchrow(SQLITE_QUERIES.select_report, "i1")
+            assert report["session_data"]["answers"] == [answer]
+    finally:
+        await read_connection.close()
+        await connection.close()
+
+@pytest.mark.asyncio
+async def test_sqlite_schema_upgrades_and_backfills_old_database(tmp_path, monkeypatch):
+    path = str(tmp_path / "old.db")
+    monkeypatch.setattr(postgres, "_sqlite_db", path)
+    questions = [{"id": "q1"}, {"id": "q2"}, {"id": "q3"}]
+    async with aiosqlite.connect(path) as old:
+        # Interviews table as created before questions/cursor got their own columns
+        await old.execute("""
+            CREATE TABLE interviews (
+                id TEXT PRIMARY KEY, candidate_id TEXT NOT NULL, candidate_name TEXT NOT NULL,
+                role TEXT NOT NULL, difficulty TEXT NOT NULL, session_data TEXT NOT NULL,
+                status TEXT DEFAULT 'active',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        await old.execute(
+            "INSERT INTO interviews (id, candidate_id, candidate_name, role, difficulty, session_data) "
+            "VALUES ('i1', 'c1', 'Ann', 'data', 'basic', ?)",
+            (json.dumps({"questions": questions, "current_question_index": 1, "answers": []}),)
+        )
+        await old.commit()
+    
+    await postgres._create_sqlite_tables()
+    await postgres._create_sqlite_tables()  # idempotent
+    
+    connection, read_connection = await _connect(path)
+    try:
+        async with SQLiteAdapter(connection, read_connection).acquire() as db:
+            row = await db.fetchrow(SQLITE_QUERIES.select_next_question, "i1")
+            assert row["question"] == questions[1]
+            assert (row["current_question_index"], row["total_questions"]) == (1, 3)
+    finally:
+        await read_connection.close()
+        await connection.close()
@@ -0,0 +1,56 @@
+"""
+Tests for the deterministic Excel evaluator
+"""
+import openpyxl
+import pytest
+
+from app.evaluator.deterministic import DeterministicEvaluator
+
+@pytest.fixture
+def workbook_path(tmp_path):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Data"
+    sheet["A1"] = "Region"
+    sheet["B2"] = 1.0
+    sheet["C3"] = "1"
+    sheet["D4"] = True
+    sheet["E5"] = 1
+    path = tmp_path / "answer.xlsx"
+    workbook.save(path)
+    return str(path)
+
+def _evaluate(workbook_path, expected_values):
+    question = {
+        "type": "practical",
+        "golden_answer": {"required_sheets": ["Data"], "expected_values": expected_values}
+    }
+    return DeterministicEvaluator().evaluate_answer(question, "", workbook_path)
+
+def test_required_sheet_found_without_full_load(workbook_path):
+    result = _evaluate(workbook_path, {})
+    assert result["test_details"] == ["✓ Sheet 'Data' exists"]
+
+@pytest.mark.parametrize("cell, expected, passes", [
+    ("Data!B2", 1, True),       # 1.0 in the sheet matches an integer 1
+    ("Data!E5", 1.0, True),
+    ("Data!C3", 1, False),      # the string "1" is not the number 1
+    ("Data!D4", 1, False),      # TRUE is not the number 1
+    ("Data!E5", True, False),
+    ("Data!D4", True, True),
+    ("Data!A1", "Region", True),
+    ("Missing!A1", "Region", False),
+])
+def test_expected_cell_values(workbook_path, cell, expected, passes):
+    result = _evaluate(workbook_path, {cell: expected})
+    mark = "✓ Correct" if passes else "✗ Incorrect"
+    assert result["test_details"][-1] == f"{mark} value in {cell}"
+
+def test_mcq_ignores_case_and_whitespace():
+    question = {"type": "mcq", "golden_answer": {"correct_option": "B"}}
+    assert DeterministicEvaluator().evaluate_answer(question, " b ")["score"] == 1.0
+
+def test_formula_checks_required_functions():
+    question = {"type": "formula", "golden_answer": {"required_functions": ["INDEX", "MATCH"]}}
+    result = DeterministicEvaluator().evaluate_answer(question, "=INDEX(B:B,MATCH(D1,A:A,0))")
+    assert result["passed_tests"] == result["total_tests"] == 3
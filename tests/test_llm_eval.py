@@ -0,0 +1,98 @@
+"""
+Tests for LLM response parsing helpers
+"""
+import pytest
+
+from app.evaluator.llm_eval import LLMEvaluator, _JSONObjectScanner, _parse_duration
+
+VALID = ('{"correctness": 3, "explanation": 2.5, "efficiency": 3, "robustness": 2, '
+         '"verdict": "pass", "confidence": 0.8, "notes": "ok"}')
+
+def _feed_in_chunks(text, size=3):
+    """Feed text to a fresh scanner; return the index of the chunk that closed the object"""
+    scanner = _JSONObjectScanner()
+    for i in range(0, len(text), size):
+        if scanner.feed(text[i:i + size]):
+            return i // size
+    return None
+
+def test_scanner_stops_at_outer_closing_brace():
+    text = '{"a": {"b": 1}} trailing'
+    assert _feed_in_chunks(text, size=1) == text.index("} trailing")
+
+def test_scanner_ignores_braces_inside_strings():
+    assert _feed_in_chunks('{"notes": "use {braces} and }"', size=1) is None
+    text = '{"notes": "}{"}'
+    assert _feed_in_chunks(text, size=1) == len(text) - 1
+
+def test_scanner_handles_escaped_quotes_and_backslashes():
+    text = '{"notes": "say \\"}\\" here", "path": "C:\\\\"}'
+    assert _feed_in_chunks(text, size=1) == len(text) - 1
+
+def test_scanner_ignores_stray_quotes_before_object():
+    text = 'Here is the "result": {"notes": "x"}'
+    assert _feed_in_chunks(text, size=1) == len(text) - 1
+
+def test_scanner_needs_an_opening_brace():
+    assert _feed_in_chunks("no json } here") is None
+
+@pytest.fixture
+def evaluator():
+    return LLMEvaluator(client=object())
+
+def test_parse_bare_json(evaluator):
+    parsed = evaluator._parse_llm_response(VALID)
+    assert parsed["verdict"] == "pass"
+    assert parsed["correctness"] == 3.0 and isinstance(parsed["correctness"], float)
+
+def test_parse_json_surrounded_by_prose(evaluator):
+    parsed = evaluator._parse_llm_response(f"Sure, here it is:\n{VALID}\nThanks!")
+    assert parsed["notes"] == "ok"
+
+def test_parse_clamps_ranges_and_unknown_verdict(evaluator):
+    text = VALID.replace('"correctness": 3', '"correctness": 7').replace('"pass"', '"maybe"')
+    text = text.replace('"confidence": 0.8', '"confidence": -1')
+    parsed = evaluator._parse_llm_response(text)
+    assert (parsed["correctness"], parsed["confidence"], parsed["verdict"]) == (4, 0, "fail")
+
+def test_parse_rejects_missing_field(evaluator):
+    with pytest.raises(ValueError):
+        evaluator._parse_llm_response(VALID.replace(', "notes": "ok"', ""))
+
+def test_parse_rejects_wrong_type(evaluator):
+    with pytest.raises(ValueError):
+        evaluator._parse_llm_response(VALID.replace('"robustness": 2', '"robustness": "high"'))
+
+def test_parse_rejects_text_without_json(evaluator):
+    with pytest.raises(ValueError):
+        evaluator._parse_llm_response("I cannot grade this answer.")
+
+@pytest.mark.parametrize("value, seconds", [
+    ("2m59.56s", 179.56),
+    ("120ms", 0.12),
+    ("1h", 3600),
+    ("7.66s", 7.66),
+    ("", 0),
+])
+def test_parse_duration(value, seconds):
+    assert _parse_duration(value) == pytest.approx(seconds)
+
+def test_det_summary_serializes_lazily_and_once(monkeypatch):
+    from app.evaluator import llm_eval
+    calls = []
+    monkeypatch.setattr(llm_eval, "_dumps_indented", lambda value: calls.append(value) or "{}")
+    
+    summary = llm_eval.DetSummary({"score": 0.5})
+    assert llm_eval.DetSummary.wrap(summary) is summary
+    assert calls == []
+    assert summary.json == summary.json == "{}"
+    assert len(calls) == 1
+
+@pytest.mark.asyncio
+async def test_mock_evaluation_skips_prompt_serialization(monkeypatch, evaluator):
+    from app.evaluator import llm_eval
+    monkeypatch.setattr(llm_eval.settings, "mock_mode", True)
+    monkeypatch.setattr(llm_eval, "_dumps_indented", lambda value: pytest.fail("serialized in mock mode"))
+    
+    result = await evaluator.evaluate_answer({"id": "q1"}, "answer", {"score": 1.0, "passed_tests": 2})
+    assert result["verdict"] == "pass"